@@ -0,0 +1,159 @@
+import os
+import math
+import time
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+
+class Shed(Exception):
+    """A request was refused by admission control; carries the HTTP status and Retry-After."""
+
+    def __init__(self, reason: str, retry_after: float, status: int = 429):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+        self.status = status
+
+
+class AdmissionController:
+    """
+    Rate limiting and load shedding shared by all local worker processes.
+
+    State lives in a small SQLite file so every process on the host sees the
+    same token buckets, encoding slots and counters:
+
+    - take(key, rate, burst): token bucket per key (e.g. "ip:1.2.3.4", "phone:+91...").
+    - encoding_slot(): global cap on concurrent face encodings with a bounded
+      wait queue; requests beyond the queue are shed immediately.
+    - incr()/stats(): admitted / shed counters. Counters are per gate: a request
+      can pass the rate limit ("<endpoint>.rate.passed") and still be shed at
+      the encoding gate ("encode.shed.*"); "encode.admitted" counts encodings run.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        encode_concurrency: int = 2,
+        max_queue: int = 8,
+        max_wait: float = 10.0,
+        stale_after: float = 120.0,
+    ):
+        self.db_path = db_path
+        self.encode_concurrency = encode_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.stale_after = stale_after  # slots held longer than this belonged to a dead worker
+        with self._tx() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS slots (id INTEGER PRIMARY KEY, state TEXT, pid INTEGER, ts REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+
+    @contextmanager
+    def _tx(self):
+        """Exclusive-write transaction across processes."""
+        db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    # ---- counters ----------------------------------------------------------
+
+    def incr(self, name: str, db=None):
+        if db is None:
+            with self._tx() as db:
+                return self.incr(name, db)
+        db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._tx() as db:
+            rows = db.execute("SELECT name, value FROM counters ORDER BY name").fetchall()
+            running, waiting = self._slot_counts(db)
+        out = dict(rows)
+        out["encode.running"] = running
+        out["encode.waiting"] = waiting
+        return out
+
+    # ---- token buckets -----------------------------------------------------
+
+    def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        """
+        Take one token from the bucket for `key` (refills `rate` tokens/sec up to `burst`).
+        Returns (allowed, retry_after_seconds).
+        """
+        now = time.time()
+        with self._tx() as db:
+            row = db.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            db.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            # Buckets idle long enough to be full again carry no state.
+            db.execute("DELETE FROM buckets WHERE updated < ?", (now - burst / rate,))
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    # ---- encoding slots ----------------------------------------------------
+
+    def _slot_counts(self, db) -> Tuple[int, int]:
+        db.execute("DELETE FROM slots WHERE ts < ?", (time.time() - self.stale_after,))
+        counts = dict(db.execute("SELECT state, COUNT(*) FROM slots GROUP BY state").fetchall())
+        return counts.get("run", 0), counts.get("wait", 0)
+
+    @contextmanager
+    def encoding_slot(self, poll_interval: float = 0.05):
+        """
+        Hold one of `encode_concurrency` global face-encoding slots.
+        Raises Shed(503) if the wait queue is full or the slot is not free within max_wait.
+        """
+        now = time.time()
+        with self._tx() as db:
+            running, waiting = self._slot_counts(db)
+            if running < self.encode_concurrency:
+                state = "run"
+            elif waiting < self.max_queue:
+                state = "wait"
+            else:
+                # Count inside the transaction, raise after it commits (_tx rolls back on error).
+                state = None
+                self.incr("encode.shed.queue_full", db)
+            if state is not None:
+                slot_id = db.execute(
+                    "INSERT INTO slots (state, pid, ts) VALUES (?, ?, ?)", (state, os.getpid(), now)
+                ).lastrowid
+        if state is None:
+            raise Shed("encode queue full", self.max_wait, status=503)
+
+        try:
+            deadline = now + self.max_wait
+            while state == "wait":
+                time.sleep(poll_interval)
+                with self._tx() as db:
+                    running, _ = self._slot_counts(db)
+                    if running < self.encode_concurrency:
+                        state = "run"
+                        db.execute("UPDATE slots SET state = 'run', ts = ? WHERE id = ?", (time.time(), slot_id))
+                    elif time.time() > deadline:
+                        state = "timeout"
+                        self.incr("encode.shed.timeout", db)
+                if state == "timeout":
+                    raise Shed("encode wait timed out", self.max_wait, status=503)
+            self.incr("encode.admitted")
+            yield
+        finally:
+            with self._tx() as db:
+                db.execute("DELETE FROM slots WHERE id = ?", (slot_id,))
@@ -3,9 +3,11 @@ import io
 import csv
 import json
 import base64
+import hashlib
+import threading
 import numpy as np
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file
+from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file, send_from_directory
 from werkzeug.utils import secure_filename
 
 # face_recognition imports
@@ -15,6 +17,15 @@ import uuid
 
 # Local fast face helper
 from fast_face import encode_face_fast, compare_encodings_fast
+# Local per-election vote partitions
+from vote_store import VoteStore, PartitionSealed
+from file_lock import locked
+# Local admission control (rate limits + face-encoding load shedding)
+from admission import AdmissionController, Shed
+# Local opt-in request profiler
+from profiling import Profiler
+# Local registration artifact staging (committed to disk only after OTP verification)
+from registration_store import RegistrationStaging
 
 # Twilio imports (optional)
 from twilio.rest import Client
@@ -42,13 +53,41 @@ TWILIO_FROM = os.getenv("TWILIO_FROM_NUMBER", "+12769001378")
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
 
+# Admission control for the face/OTP endpoints. Limits are per minute; state is shared
+# by all worker processes on this host through a SQLite file in DATA_DIR.
+RATE_LIMIT_PER_IP = float(os.getenv("RATE_LIMIT_PER_IP", "20"))
+RATE_LIMIT_PER_PHONE = float(os.getenv("RATE_LIMIT_PER_PHONE", "5"))
+ENCODE_CONCURRENCY = int(os.getenv("ENCODE_CONCURRENCY", str(os.cpu_count() or 2)))
+ENCODE_MAX_QUEUE = int(os.getenv("ENCODE_MAX_QUEUE", str(2 * ENCODE_CONCURRENCY)))
+ENCODE_MAX_WAIT = float(os.getenv("ENCODE_MAX_WAIT", "10"))
+
+# Sampling profiler (off by default). PROFILE_SAMPLE_RATE is the fraction of requests
+# sampled, e.g. 0.05; stacks are written per route to data/profiles/ for admins to download.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+# Max pending (unverified) registrations whose face image/encoding are held in memory.
+# Pending registrations are refused (503 + Retry-After), never evicted, when either cap is hit.
+REGISTRATION_STAGING_MAX = int(os.getenv("REGISTRATION_STAGING_MAX", "64"))
+REGISTRATION_STAGING_PER_IP = int(os.getenv("REGISTRATION_STAGING_PER_IP", "8"))
+OTP_TTL = timedelta(minutes=5)
+
 # OTP storage (in-memory). For production use persistent store with expiry (Redis, DB).
 otp_store = {}  # phone -> {"otp": "...", "expires": datetime, "purpose":"register"/"login", "temp_user": {...}}
 
 # CSV paths
 ELECTIONS_CSV = os.path.join(DATA_DIR, "elections.csv")
 CANDIDATES_CSV = os.path.join(DATA_DIR, "candidates.csv")
-VOTES_CSV = os.path.join(DATA_DIR, "votes.csv")
+VOTES_CSV = os.path.join(DATA_DIR, "votes.csv")  # legacy single-file store, migrated on startup
+VOTES_DIR = os.path.join(DATA_DIR, "votes")
+RESULTS_DIR = os.path.join(DATA_DIR, "results")  # frozen per-election results written at close
+LATEST_RESULTS_JSON = os.path.join(RESULTS_DIR, "latest.json")
+os.makedirs(RESULTS_DIR, exist_ok=True)
+
+# Fingerprinted, precompressed static bundles (built by `python build_assets.py`)
+DIST_DIR = os.path.join(BASE_DIR, "static", "dist")
+ASSET_MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+ASSET_MAX_AGE = 365 * 24 * 3600
 
 # CSV header ensure
 if not os.path.exists(CSV_PATH):
@@ -66,10 +105,33 @@ if not os.path.exists(CANDIDATES_CSV):
         writer = csv.writer(f)
         writer.writerow(["id", "election_id", "user_id", "name", "created_at"])
 
-if not os.path.exists(VOTES_CSV):
-    with open(VOTES_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["id", "election_id", "voter_id", "candidate_id", "created_at"])
+admission = AdmissionController(
+    os.path.join(DATA_DIR, "admission.sqlite3"),
+    encode_concurrency=ENCODE_CONCURRENCY,
+    max_queue=ENCODE_MAX_QUEUE,
+    max_wait=ENCODE_MAX_WAIT,
+)
+
+profiler = Profiler(
+    os.path.join(DATA_DIR, "profiles"),
+    sample_rate=PROFILE_SAMPLE_RATE,
+    interval=PROFILE_INTERVAL_MS / 1000.0,
+)
+profiler.init_app(app)
+
+registration_staging = RegistrationStaging(
+    max_entries=REGISTRATION_STAGING_MAX,
+    max_per_owner=REGISTRATION_STAGING_PER_IP,
+    ttl_seconds=OTP_TTL.total_seconds(),
+)
+
+# Votes are stored per election (data/votes/<election_id>.csv); closed elections are sealed.
+vote_store = VoteStore(VOTES_DIR)
+with open(ELECTIONS_CSV, newline="", encoding="utf-8") as f:
+    vote_store.migrate_legacy(
+        VOTES_CSV,
+        [e["id"] for e in csv.DictReader(f) if e.get("status") == "closed"],
+    )
 
 def send_otp(phone: str, otp: str):
     """
@@ -92,6 +154,16 @@ def send_otp(phone: str, otp: str):
     print(f"[DEBUG] OTP for {phone}: {otp}")
     return False
 
+def discard_pending_otp(phone):
+    """Drop a phone's pending OTP and any registration artifacts staged with it."""
+    rec = otp_store.pop(phone, None)
+    if rec and rec.get("purpose") == "register":
+        registration_staging.discard(rec["temp_user"]["id"])
+
+def shed_staging_full(retry_after):
+    admission.incr("register.shed.staging_full")
+    raise Shed("registration staging full", retry_after, status=503)
+
 def generate_otp():
     import random
     return f"{random.randint(1000, 9999)}"
@@ -150,6 +222,31 @@ def write_csv_rows(path, fieldnames, rows):
             writer.writerow(r)
 
 
+def admit(endpoint, phone=None):
+    """
+    Charge one token from the caller's per-IP and per-phone buckets.
+    Raises Shed (answered with 429 + Retry-After) when either is empty.
+    "<endpoint>.rate.passed" only means the rate limit let the request through;
+    face-encoding endpoints can still be shed afterwards (see "encode.shed.*").
+    """
+    checks = [("ip", request.remote_addr or "unknown", RATE_LIMIT_PER_IP)]
+    if phone:
+        checks.append(("phone", phone, RATE_LIMIT_PER_PHONE))
+    for kind, key, per_minute in checks:
+        allowed, retry_after = admission.take(f"{kind}:{key}", per_minute / 60.0, per_minute)
+        if not allowed:
+            admission.incr(f"{endpoint}.rate.shed_{kind}")
+            raise Shed(f"{kind} rate limit", retry_after)
+    admission.incr(f"{endpoint}.rate.passed")
+
+
+@app.errorhandler(Shed)
+def handle_shed(e):
+    app.logger.info("Shed request to %s: %s", request.path, e.reason)
+    message = "Too many requests." if e.status == 429 else "Server busy."
+    return f"{message} Please retry in {e.retry_after} seconds.", e.status, {"Retry-After": str(e.retry_after)}
+
+
 def get_current_election():
     """Return active election dict or None."""
     elections = read_csv_as_dicts(ELECTIONS_CSV)
@@ -160,6 +257,134 @@ def get_current_election():
     active.sort(key=lambda e: e.get("started_at") or "", reverse=True)
     return active[0]
 
+def build_results_snapshot(election):
+    """Tally a closed election's sealed vote partition into a results dict."""
+    candidates = read_csv_as_dicts(CANDIDATES_CSV)
+    vote_counts = vote_store.counts(election["id"])
+
+    results = []
+    total_votes = 0
+    for c in candidates:
+        if c["election_id"] == election["id"]:
+            count = vote_counts.get(c["id"], 0)
+            total_votes += count
+            results.append({"id": c["id"], "name": c["name"], "votes": count})
+
+    results.sort(key=lambda x: x["votes"], reverse=True)
+
+    winner = results[0] if results else {"id": "", "name": "-", "votes": 0}
+    runner_up = results[1] if len(results) > 1 else {"votes": 0}
+
+    return {
+        "election": election,
+        "candidates": results,
+        "winner": winner,
+        "total_votes": total_votes,
+        "win_percentage": round((winner["votes"] / total_votes) * 100, 2) if total_votes else 0,
+        "vote_diff": winner["votes"] - runner_up["votes"],
+        "votes_sha256": vote_store.checksum(election["id"]),
+        "computed_at": datetime.utcnow().isoformat(),
+    }
+
+
+def write_results_snapshot(election):
+    """
+    Compute and persist the immutable results snapshot for a closed election.
+    Also refreshes latest.json, which /results serves. Runs under snapshot.lock so
+    concurrent requests/workers tally once and never race on the same files.
+    """
+    path = os.path.join(RESULTS_DIR, f"{secure_filename(election['id'])}.json")
+    with locked(os.path.join(RESULTS_DIR, "snapshot.lock")):
+        if os.path.exists(path):
+            # Snapshots are final once written; never recount.
+            with open(path, "rb") as f:
+                data = f.read()
+        else:
+            data = json.dumps(build_results_snapshot(election), indent=2).encode("utf-8")
+            write_file_atomic(path, data)
+            os.chmod(path, 0o444)
+        write_file_atomic(LATEST_RESULTS_JSON, data)
+    return data
+
+
+def write_file_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_latest_results_snapshot():
+    """
+    Return the raw bytes of the most recent results snapshot, or None.
+    Elections closed before snapshots existed get one built on first request.
+    """
+    if os.path.exists(LATEST_RESULTS_JSON):
+        with open(LATEST_RESULTS_JSON, "rb") as f:
+            return f.read()
+
+    elections = read_csv_as_dicts(ELECTIONS_CSV)
+    closed = [e for e in elections if e.get("status") == "closed"]
+    if not closed:
+        return None
+    closed.sort(key=lambda e: e.get("ended_at", ""), reverse=True)
+    vote_store.seal(closed[0]["id"])
+    return write_results_snapshot(closed[0])
+
+_asset_manifest_cache = {"mtime": None, "manifest": {}}
+
+
+def get_asset_manifest():
+    """
+    Return {"css/base.css": "css/base.<hash>.css", ...} or {} if assets are not built.
+    Reloaded whenever build_assets.py replaces manifest.json, so no restart is needed.
+    """
+    try:
+        mtime = os.stat(ASSET_MANIFEST_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if mtime != _asset_manifest_cache["mtime"]:
+        with open(ASSET_MANIFEST_PATH, encoding="utf-8") as f:
+            _asset_manifest_cache["manifest"] = json.load(f)
+        _asset_manifest_cache["mtime"] = mtime
+    return _asset_manifest_cache["manifest"]
+
+
+@app.template_global()
+def asset_url(path):
+    """URL for a static CSS/JS file: the fingerprinted bundle if built, else the plain file."""
+    hashed = get_asset_manifest().get(path)
+    if hashed:
+        return url_for("dist_asset", filename=hashed)
+    return url_for("static", filename=path)
+
+
+@app.route("/assets/<path:filename>")
+def dist_asset(filename):
+    """
+    Serve a fingerprinted bundle, preferring its precompressed .br/.gz variant.
+    Filenames change with content, so responses are cached as immutable; bundles
+    from earlier builds stay servable for pages that still reference them.
+    """
+    if not filename.endswith((".css", ".js")) or not os.path.isfile(os.path.join(DIST_DIR, filename)):
+        return "Asset not found", 404
+
+    mimetype = "text/css" if filename.endswith(".css") else "application/javascript"
+    accepted = request.accept_encodings
+    encoding = None
+    for enc, ext in (("br", ".br"), ("gzip", ".gz")):
+        if accepted[enc] and os.path.exists(os.path.join(DIST_DIR, filename + ext)):
+            encoding = enc
+            filename += ext
+            break
+
+    response = send_from_directory(DIST_DIR, filename, mimetype=mimetype)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = f"public, max-age={ASSET_MAX_AGE}, immutable"
+    return response
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -175,40 +400,40 @@ def register():
         if not (name and phone and face_image_b64):
             flash("Name, phone and face capture required.")
             return redirect(url_for("register"))
+        admit("register", phone)
+
+        # A new attempt supersedes this phone's pending one; then make sure there is
+        # staging room before spending CPU on the face encoding.
+        client_ip = request.remote_addr or "unknown"
+        discard_pending_otp(phone)
+        wait = registration_staging.retry_after(client_ip)
+        if wait:
+            shed_staging_full(wait)
 
         # Decode image and compute face encoding (fast helper)
         pil_img = decode_base64_image(face_image_b64)
-        encoding = encode_face_fast(pil_img)
+        with admission.encoding_slot():
+            encoding = encode_face_fast(pil_img)
         if encoding is None:
             flash("No face detected or could not encode face. Try again.")
             return redirect(url_for("register"))
 
-        # save encoding to file
+        # Hold encoding + face image in memory; they are written to ENC_DIR only after OTP verification
         reg_id = str(uuid.uuid4())
-        encoding_file = f"{reg_id}.npy"
-        encoding_path = os.path.join(ENC_DIR, encoding_file)
-        np.save(encoding_path, encoding)
-
-        # save actual face image
-        image_file = f"{reg_id}.png"
-        image_path = os.path.join(ENC_DIR, image_file)
-        pil_img.save(image_path)
-
+        if not registration_staging.put(reg_id, encoding, pil_img, owner=client_ip):
+            shed_staging_full(registration_staging.retry_after(client_ip))
 
-        # prepare temp user info and send OTP
         # prepare temp user info and send OTP
         otp = generate_otp()
         otp_store[phone] = {
             "otp": otp,
-            "expires": datetime.utcnow() + timedelta(minutes=5),
+            "expires": datetime.utcnow() + OTP_TTL,
             "purpose": "register",
             "temp_user": {
                 "id": reg_id,
                 "name": name,
                 "email": email,
                 "phone": phone,
-                "encoding_file": encoding_file,
-                "image_file": image_file   # store image filename too
             }
         }
         send_otp(phone, otp)
@@ -232,7 +457,7 @@ def verify_otp():
             flash("OTP not found or expired.")
             return redirect(url_for("index"))
         if datetime.utcnow() > rec["expires"]:
-            otp_store.pop(phone, None)
+            discard_pending_otp(phone)
             flash("OTP expired.")
             return redirect(url_for("index"))
         if entered != rec["otp"]:
@@ -240,11 +465,17 @@ def verify_otp():
             return redirect(url_for("verify_otp"))
         # OTP correct
         if rec["purpose"] == "register":
+            committed = registration_staging.commit(rec["temp_user"]["id"], ENC_DIR)
+            otp_store.pop(phone, None)
+            if committed is None:
+                session.pop("pending_phone", None)
+                flash("Registration expired. Please register again.")
+                return redirect(url_for("register"))
+            rec["temp_user"]["encoding_file"], rec["temp_user"]["image_file"] = committed
             save_registration_to_csv(rec["temp_user"])
             # keep user logged in minimal
             session["user_id"] = rec["temp_user"]["id"]
             session["user_name"] = rec["temp_user"]["name"]
-            otp_store.pop(phone, None)
             session.pop("pending_phone", None)
             flash("Registration successful.")
             return redirect(url_for("dashboard"))
@@ -288,6 +519,7 @@ def login():
         if not phone:
             flash("Enter phone number.")
             return redirect(url_for("login"))
+        admit("login", phone)
         # Check registration exists (look into CSV)
         found = get_user_by_phone(phone)
         if not found:
@@ -295,9 +527,10 @@ def login():
             return redirect(url_for("login"))
 
         otp = generate_otp()
+        discard_pending_otp(phone)
         otp_store[phone] = {
             "otp": otp,
-            "expires": datetime.utcnow() + timedelta(minutes=5),
+            "expires": datetime.utcnow() + OTP_TTL,
             "purpose": "login"
         }
         send_otp(phone, otp)
@@ -317,8 +550,10 @@ def capture_face_for_login():
         if not face_image_b64:
             flash("Capture face first.")
             return redirect(url_for("capture_face_for_login"))
+        admit("capture_face_for_login", phone)
         pil_img = decode_base64_image(face_image_b64)
-        login_encoding = encode_face_fast(pil_img)
+        with admission.encoding_slot():
+            login_encoding = encode_face_fast(pil_img)
         if login_encoding is None:
             flash("No face detected or could not encode face.")
             return redirect(url_for("capture_face_for_login"))
@@ -384,11 +619,7 @@ def dashboard():
     if current_election:
         all_candidates = read_csv_as_dicts(CANDIDATES_CSV)
         election_candidates = [c for c in all_candidates if c.get("election_id") == current_election["id"]]
-        all_votes = read_csv_as_dicts(VOTES_CSV)
-        for v in all_votes:
-            if v.get("election_id") == current_election["id"] and v.get("voter_id") == user_id:
-                user_vote = v
-                break
+        user_vote = vote_store.get_vote(current_election["id"], user_id)
 
     return render_template(
         "dashboard.html",
@@ -421,6 +652,37 @@ def admin_logout():
     return redirect(url_for("index"))
 
 
+@app.route("/admin/admission")
+def admin_admission_stats():
+    """
+    Rate-limit counters per endpoint (<endpoint>.rate.passed / .rate.shed_ip / .rate.shed_phone),
+    face-encoding gate counters (encode.admitted / encode.shed.*) and current encode load, as JSON.
+    """
+    if not session.get("admin"):
+        flash("Admin login required.")
+        return redirect(url_for("admin_login"))
+    return admission.stats()
+
+
+@app.route("/admin/profiles")
+def admin_profiles():
+    """List per-route profile files (collapsed stacks and top-N hotspot summaries)."""
+    if not session.get("admin"):
+        flash("Admin login required.")
+        return redirect(url_for("admin_login"))
+    return {"enabled": profiler.enabled, "sample_rate": profiler.sample_rate, "files": profiler.files()}
+
+
+@app.route("/admin/profiles/<filename>")
+def admin_profile_download(filename):
+    if not session.get("admin"):
+        flash("Admin login required.")
+        return redirect(url_for("admin_login"))
+    if not filename.endswith((".collapsed", ".top.txt")):
+        return "Profile not found", 404
+    return send_from_directory(profiler.out_dir, filename, mimetype="text/plain", as_attachment=True)
+
+
 @app.route("/admin/election/start", methods=["POST"])
 def admin_start_election():
     if not session.get("admin"):
@@ -469,16 +731,20 @@ def admin_close_election():
         return redirect(url_for("admin_dashboard"))
 
     now = datetime.utcnow().isoformat()
+    closed_election = None
     for e in elections:
         if e.get("id") == current["id"]:
             e["status"] = "closed"
             e["ended_at"] = now
+            closed_election = e
             break
     write_csv_rows(
         ELECTIONS_CSV,
         ["id", "name", "status", "created_at", "started_at", "ended_at"],
         elections,
     )
+    vote_store.seal(current["id"])
+    write_results_snapshot(closed_election)
     flash("Current election has been closed and results are final.")
     return redirect(url_for("admin_dashboard"))
 
@@ -499,27 +765,20 @@ def admin_dashboard():
     current_election = get_current_election()
     elections = read_csv_as_dicts(ELECTIONS_CSV)
     all_candidates = read_csv_as_dicts(CANDIDATES_CSV)
-    all_votes = read_csv_as_dicts(VOTES_CSV)
 
     # Candidates for current election with vote counts
     election_candidates = []
+    total_votes = 0
     if current_election:
+        vote_counts = vote_store.counts(current_election["id"])
         for c in all_candidates:
             if c.get("election_id") == current_election["id"]:
-                vote_count = sum(
-                    1
-                    for v in all_votes
-                    if v.get("election_id") == current_election["id"]
-                    and v.get("candidate_id") == c.get("id")
-                )
                 c_with_count = dict(c)
-                c_with_count["vote_count"] = vote_count
+                c_with_count["vote_count"] = vote_counts.get(c.get("id"), 0)
                 election_candidates.append(c_with_count)
 
-    # Simple total votes for summary
-    total_votes = 0
-    if current_election:
-        total_votes = sum(1 for v in all_votes if v.get("election_id") == current_election["id"])
+        # Simple total votes for summary
+        total_votes = vote_store.total(current_election["id"])
 
     return render_template(
         "admin_dashboard.html",
@@ -546,11 +805,7 @@ def vote_page():
             c for c in candidates if c.get("election_id") == current_election["id"]
         ]
 
-        votes = read_csv_as_dicts(VOTES_CSV)
-        for v in votes:
-            if v.get("election_id") == current_election["id"] and v.get("voter_id") == session.get("user_id"):
-                user_vote = v
-                break
+        user_vote = vote_store.get_vote(current_election["id"], session.get("user_id"))
 
     return render_template(
         "vote.html",
@@ -589,29 +844,25 @@ def cast_vote():
         flash("Invalid candidate selection.")
         return redirect(url_for("dashboard"))
 
-    votes = read_csv_as_dicts(VOTES_CSV)
-    # Enforce one-time voting per election per user
-    for v in votes:
-        if v.get("election_id") == current_election["id"] and v.get("voter_id") == voter_id:
-            flash("You have already voted in this election.")
-            return redirect(url_for("dashboard"))
-
     vote_id = str(uuid.uuid4())
     now = datetime.utcnow().isoformat()
-    votes.append(
-        {
-            "id": vote_id,
-            "election_id": current_election["id"],
-            "voter_id": voter_id,
-            "candidate_id": candidate_id,
-            "created_at": now,
-        }
-    )
-    write_csv_rows(
-        VOTES_CSV,
-        ["id", "election_id", "voter_id", "candidate_id", "created_at"],
-        votes,
-    )
+    try:
+        # Enforce one-time voting per election per user (checked against this election's partition only)
+        recorded = vote_store.record_vote(
+            {
+                "id": vote_id,
+                "election_id": current_election["id"],
+                "voter_id": voter_id,
+                "candidate_id": candidate_id,
+                "created_at": now,
+            }
+        )
+    except PartitionSealed:
+        flash("This election is closed.")
+        return redirect(url_for("dashboard"))
+    if not recorded:
+        flash("You have already voted in this election.")
+        return redirect(url_for("dashboard"))
     flash("Your vote has been recorded.")
     return redirect(url_for("dashboard"))
 
@@ -671,51 +922,44 @@ def admin_add_candidate():
 
 @app.route("/results")
 def election_results():
-    elections = read_csv_as_dicts(ELECTIONS_CSV)
-
-    closed = [e for e in elections if e.get("status") == "closed"]
-    if not closed:
+    """Serve the frozen results snapshot of the most recently closed election."""
+    data = load_latest_results_snapshot()
+    if data is None:
         flash("No results available yet.")
         return redirect(url_for("dashboard"))
 
-    closed.sort(key=lambda e: e.get("ended_at", ""), reverse=True)
-    current = closed[0]
-
-    candidates = read_csv_as_dicts(CANDIDATES_CSV)
-    votes = read_csv_as_dicts(VOTES_CSV)
-
-    results = []
-    total_votes = 0
-
-    for c in candidates:
-        if c["election_id"] == current["id"]:
-            count = sum(
-                1 for v in votes
-                if v["election_id"] == current["id"]
-                and v["candidate_id"] == c["id"]
-            )
-            total_votes += count
-            results.append({"name": c["name"], "votes": count})
-
-    results.sort(key=lambda x: x["votes"], reverse=True)
-
-    winner = results[0]
-    runner_up = results[1] if len(results) > 1 else {"votes": 0}
-
     # ✅ ROLE-BASED BACK LINK
-    back_url = url_for("admin_dashboard") if session.get("admin") else url_for("dashboard")
+    is_admin = bool(session.get("admin"))
+    back_url = url_for("admin_dashboard") if is_admin else url_for("dashboard")
+
+    # Besides the snapshot, the page (via base.html) only depends on the admin flag and
+    # whether a voter is logged in, so those make up the ETag and clients can revalidate
+    # cheaply. Pages carrying flash messages are never cached or answered with 304.
+    viewer = f"{'admin' if is_admin else 'noadmin'}-{'voter' if session.get('user_id') else 'anon'}"
+    etag = f"{hashlib.sha256(data).hexdigest()[:32]}-{viewer}"
+    has_flashes = bool(session.get("_flashes"))
+    if not has_flashes and request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        snapshot = json.loads(data)
+        response = app.make_response(render_template(
+            "results.html",
+            election=snapshot["election"],
+            candidates=snapshot["candidates"],
+            winner=snapshot["winner"],
+            total_votes=snapshot["total_votes"],
+            win_percentage=snapshot["win_percentage"],
+            vote_diff=snapshot["vote_diff"],
+            back_url=back_url
+        ))
+    if has_flashes:
+        response.headers["Cache-Control"] = "no-store"
+    else:
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Cookie")
+    return response
 
-    return render_template(
-        "results.html",
-        election=current,
-        candidates=results,
-        winner=winner,
-        total_votes=total_votes,
-        win_percentage=round((winner["votes"] / total_votes) * 100, 2),
-        vote_diff=winner["votes"] - runner_up["votes"],
-        back_url=back_url
-    )
-    
 if __name__ == "__main__":
     app.run(debug=True)
 
@@ -0,0 +1,117 @@
+"""
+Build fingerprinted, precompressed static bundles.
+
+Copies every file under static/css and static/js to static/dist/ with a
+content hash in its name (e.g. css/base.3f9a1c2b7e4d.css), writes .gz and,
+if the `brotli` package is installed, .br variants next to it, and records
+the mapping in static/dist/manifest.json for app.asset_url().
+
+Bundles from earlier builds are kept, so HTML already served (or cached by
+browsers) keeps working; the running app picks up the new manifest on its own.
+
+Run after editing any CSS/JS:
+    python build_assets.py [--prune]
+"""
+import os
+import gzip
+import json
+import hashlib
+import argparse
+
+try:
+    import brotli  # optional
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+ASSET_DIRS = ["css", "js"]
+
+
+def fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def build():
+    """Write any new bundles into static/dist, swap in the new manifest and return it."""
+    manifest = {}
+    for asset_dir in ASSET_DIRS:
+        src_dir = os.path.join(STATIC_DIR, asset_dir)
+        if not os.path.isdir(src_dir):
+            continue
+        os.makedirs(os.path.join(DIST_DIR, asset_dir), exist_ok=True)
+        for filename in sorted(os.listdir(src_dir)):
+            src_path = os.path.join(src_dir, filename)
+            if not os.path.isfile(src_path):
+                continue
+            with open(src_path, "rb") as f:
+                data = f.read()
+
+            stem, ext = os.path.splitext(filename)
+            hashed = f"{asset_dir}/{stem}.{fingerprint(data)}{ext}"
+            out_path = os.path.join(DIST_DIR, hashed)
+            # Same hash means same content; files already built are left alone.
+            # mtime=0 keeps the .gz byte-identical across builds
+            _write_once(out_path + ".gz", lambda: gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_once(out_path + ".br", lambda: brotli.compress(data, quality=11))
+            # Plain file last: the app serves a bundle once it exists, variants are then complete.
+            _write_once(out_path, lambda: data)
+
+            manifest[f"{asset_dir}/{filename}"] = hashed
+
+    os.makedirs(DIST_DIR, exist_ok=True)
+    tmp = f"{MANIFEST_PATH}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, MANIFEST_PATH)
+    return manifest
+
+
+def _write_once(path: str, make_bytes):
+    if os.path.exists(path):
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(make_bytes())
+    os.replace(tmp, path)
+
+
+def prune(manifest):
+    """Remove bundles (and their .gz/.br) not referenced by `manifest`; returns removed paths."""
+    keep = set(manifest.values())
+    removed = []
+    for asset_dir in ASSET_DIRS:
+        out_dir = os.path.join(DIST_DIR, asset_dir)
+        if not os.path.isdir(out_dir):
+            continue
+        for name in sorted(os.listdir(out_dir)):
+            bundle = f"{asset_dir}/{name}"
+            for ext in (".gz", ".br"):
+                if bundle.endswith(ext):
+                    bundle = bundle[: -len(ext)]
+            if bundle not in keep:
+                os.remove(os.path.join(out_dir, name))
+                removed.append(f"{asset_dir}/{name}")
+    return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build fingerprinted static bundles.")
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="delete bundles from earlier builds (only once no cached page references them)",
+    )
+    args = parser.parse_args()
+
+    built = build()
+    for src, hashed in built.items():
+        print(f"{src} -> dist/{hashed}")
+    if args.prune:
+        for name in prune(built):
+            print(f"pruned dist/{name}")
+    if brotli is None:
+        print("[INFO] brotli not installed; only gzip variants were written.")
@@ -0,0 +1,144 @@
+import os
+import sys
+import random
+import threading
+from collections import Counter
+from typing import Dict, List
+
+from flask import g, request
+
+from file_lock import locked
+
+
+def collapse_stack(frame) -> str:
+    """Render a frame chain as one collapsed-stack line, outermost call first."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class RequestSampler:
+    """Background thread that samples one thread's Python stack every `interval` seconds."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[collapse_stack(frame)] += 1
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+class Profiler:
+    """
+    Opt-in per-request sampling profiler.
+
+    A `sample_rate` fraction of requests is sampled; stacks are aggregated per
+    endpoint into `<endpoint>.collapsed` (input for flamegraph.pl / speedscope)
+    and `<endpoint>.top.txt` (top-N self/inclusive hotspots) under `out_dir`.
+    Nothing is hooked into the app unless sample_rate > 0.
+    """
+
+    def __init__(self, out_dir: str, sample_rate: float = 0.0, interval: float = 0.005, top_n: int = 30):
+        self.out_dir = out_dir
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.top_n = top_n
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        os.makedirs(self.out_dir, exist_ok=True)
+        app.before_request(self._start)
+        app.teardown_request(self._finish)
+
+    def _start(self):
+        if random.random() < self.sample_rate:
+            g._profile_sampler = RequestSampler(threading.get_ident(), self.interval)
+
+    def _finish(self, exc=None):
+        sampler = g.pop("_profile_sampler", None)
+        if sampler is not None:
+            samples = sampler.stop()
+            if samples:
+                self.record(request.endpoint or "unmatched", samples)
+
+    # ---- output ------------------------------------------------------------
+
+    def _read_collapsed(self, path: str) -> Counter:
+        counts: Counter = Counter()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    stack, _, n = line.rstrip("\n").rpartition(" ")
+                    if stack and n.isdigit():
+                        counts[stack] += int(n)
+        return counts
+
+    def record(self, route: str, samples: Counter):
+        """
+        Merge one request's samples into the route's collapsed and top-N files.
+        The read-modify-write holds <route>.lock so concurrent workers never drop samples.
+        """
+        base = os.path.join(self.out_dir, route.replace(".", "_"))
+        with self._lock, locked(base + ".lock"):
+            counts = self._read_collapsed(base + ".collapsed")
+            counts.update(samples)
+            self._write(base + ".collapsed", "".join(f"{s} {n}\n" for s, n in sorted(counts.items())))
+            self._write(base + ".top.txt", self.summarize(route, counts))
+
+    @staticmethod
+    def _write(path: str, text: str):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def summarize(self, route: str, counts: Counter) -> str:
+        """Top-N functions by self samples (leaf frame) and inclusive samples."""
+        total = sum(counts.values())
+        self_counts: Counter = Counter()
+        incl_counts: Counter = Counter()
+        for stack, n in counts.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += n
+            for name in set(frames):
+                incl_counts[name] += n
+
+        lines = [
+            f"route: {route}",
+            f"samples: {total} (interval {self.interval * 1000:g} ms)",
+            "",
+            f"{'self%':>7} {'total%':>7}  function",
+        ]
+        for name, n in self_counts.most_common(self.top_n):
+            lines.append(f"{100.0 * n / total:6.1f}% {100.0 * incl_counts[name] / total:6.1f}%  {name}")
+        return "\n".join(lines) + "\n"
+
+    def files(self) -> List[Dict[str, object]]:
+        if not os.path.isdir(self.out_dir):
+            return []
+        return [
+            {"name": name, "bytes": os.path.getsize(os.path.join(self.out_dir, name))}
+            for name in sorted(os.listdir(self.out_dir))
+            if name.endswith((".collapsed", ".top.txt"))
+        ]
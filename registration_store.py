@@ -0,0 +1,141 @@
+"""
+Registration artifacts: in-memory staging until OTP verification, and an
+orphan collector for data/encodings/.
+
+Reclaim orphaned encoding/image files (no matching registrations.csv row):
+    python registration_store.py [--dry-run] [--grace SECONDS]
+"""
+import os
+import csv
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+ENC_DIR = os.path.join(DATA_DIR, "encodings")
+CSV_PATH = os.path.join(DATA_DIR, "registrations.csv")
+ARTIFACT_EXTENSIONS = (".npy", ".png")
+
+
+class RegistrationStaging:
+    """
+    Bounded in-memory holding area for a pending registration's face encoding
+    and image. Nothing touches disk until the OTP is verified and commit() runs.
+
+    Entries expire after `ttl_seconds`. Live entries are never evicted: when the
+    area holds `max_entries`, or the owner (client IP) already has
+    `max_per_owner` pending, new registrations are refused until one expires or
+    is committed, so bot traffic cannot push out real users' pending sign-ups.
+    """
+
+    def __init__(self, max_entries: int = 64, ttl_seconds: float = 300, max_per_owner: int = 8):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_per_owner = max_per_owner
+        self._entries: "OrderedDict[str, Tuple[float, Optional[str], np.ndarray, Image.Image]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expire(self, now: float):
+        """Drop expired entries (oldest first); caller holds the lock."""
+        while self._entries:
+            reg_id, (staged_at, _, _, _) = next(iter(self._entries.items()))
+            if now - staged_at <= self.ttl_seconds:
+                break
+            self._entries.pop(reg_id)
+
+    def _retry_after(self, now: float, owner: Optional[str]) -> float:
+        """Seconds until `owner` could stage again, 0 if there is room; caller holds the lock."""
+        self._expire(now)
+        if len(self._entries) >= self.max_entries:
+            oldest = next(iter(self._entries.values()))[0]
+            return oldest + self.ttl_seconds - now
+        if owner is not None:
+            owned = [staged_at for staged_at, o, _, _ in self._entries.values() if o == owner]
+            if len(owned) >= self.max_per_owner:
+                return owned[0] + self.ttl_seconds - now
+        return 0.0
+
+    def retry_after(self, owner: Optional[str] = None) -> float:
+        """Cheap pre-check before encoding a face: 0 if put() would currently succeed."""
+        with self._lock:
+            return self._retry_after(time.time(), owner)
+
+    def put(self, reg_id: str, encoding: np.ndarray, image: Image.Image, owner: Optional[str] = None) -> bool:
+        """Stage a registration; returns False (nothing stored) if the area or owner is full."""
+        now = time.time()
+        with self._lock:
+            if self._retry_after(now, owner) > 0:
+                return False
+            self._entries[reg_id] = (now, owner, encoding, image)
+            return True
+
+    def discard(self, reg_id: str):
+        with self._lock:
+            self._entries.pop(reg_id, None)
+
+    def commit(self, reg_id: str, enc_dir: str) -> Optional[Tuple[str, str]]:
+        """
+        Write a staged registration's .npy and .png into enc_dir.
+        Returns (encoding_file, image_file), or None if the entry expired or was discarded.
+        """
+        with self._lock:
+            entry = self._entries.pop(reg_id, None)
+        if entry is None or time.time() - entry[0] > self.ttl_seconds:
+            return None
+        _, _, encoding, image = entry
+        encoding_file = f"{reg_id}.npy"
+        image_file = f"{reg_id}.png"
+        np.save(os.path.join(enc_dir, encoding_file), encoding)
+        image.save(os.path.join(enc_dir, image_file))
+        return encoding_file, image_file
+
+
+def collect_orphans(enc_dir: str, registrations_csv: str, grace_seconds: float = 600, dry_run: bool = False) -> List[str]:
+    """
+    Remove encoding/image files in enc_dir that no registrations.csv row refers to.
+
+    A file is kept if its name or its registration id (the file stem) appears in
+    any row. Files modified within `grace_seconds` are skipped so a registration
+    being committed right now is never collected. Returns the orphan filenames.
+    """
+    referenced = set()
+    if os.path.exists(registrations_csv):
+        with open(registrations_csv, newline="", encoding="utf-8") as f:
+            # Older rows and the header disagree on columns; read positionally.
+            for row in csv.reader(f):
+                referenced.update(v for v in row if v)
+
+    cutoff = time.time() - grace_seconds
+    orphans = []
+    for name in sorted(os.listdir(enc_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext not in ARTIFACT_EXTENSIONS or name in referenced or stem in referenced:
+            continue
+        path = os.path.join(enc_dir, name)
+        if os.path.getmtime(path) > cutoff:
+            continue
+        orphans.append(name)
+        if not dry_run:
+            os.remove(path)
+    return orphans
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reclaim orphaned files in data/encodings/.")
+    parser.add_argument("--dry-run", action="store_true", help="only list orphans")
+    parser.add_argument("--grace", type=float, default=600, help="skip files newer than this many seconds")
+    args = parser.parse_args()
+
+    removed = collect_orphans(ENC_DIR, CSV_PATH, grace_seconds=args.grace, dry_run=args.dry_run)
+    for name in removed:
+        print(("[DRY-RUN] " if args.dry_run else "") + f"orphan: {name}")
+    print(f"{len(removed)} orphaned file(s) {'found' if args.dry_run else 'removed'}.")
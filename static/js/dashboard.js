@@ -0,0 +1,89 @@
+function downloadIdCard() {
+  const button = document.getElementById('downloadIdCard');
+  const card = document.querySelector('.id-card');
+
+  if (!card) {
+    alert('ID card not found');
+    return;
+  }
+
+  button.disabled = true;
+  button.textContent = '⏳ Generating...';
+
+  // Ensure images are loaded with CORS
+  const images = card.querySelectorAll('img');
+  let imagesLoaded = 0;
+  const totalImages = images.length;
+
+  // Function to generate the card
+  function generateCard() {
+    html2canvas(card, {
+      backgroundColor: '#667eea',
+      scale: 2,
+      useCORS: true,
+      logging: false,
+      allowTaint: false,
+      width: card.offsetWidth,
+      height: card.offsetHeight,
+      onclone: function(clonedDoc) {
+        // Remove animation from cloned document
+        const clonedCard = clonedDoc.querySelector('.id-card');
+        if (clonedCard) {
+          clonedCard.style.animation = 'none';
+          // Also stop the ::before pseudo-element animation
+          const style = clonedDoc.createElement('style');
+          style.textContent = '.id-card::before { animation: none !important; }';
+          clonedDoc.head.appendChild(style);
+        }
+      }
+    }).then(function(canvas) {
+      // Convert canvas to blob and download
+      canvas.toBlob(function(blob) {
+        const url = URL.createObjectURL(blob);
+        const link = document.createElement('a');
+        const userId = button.dataset.userId || 'card';
+        link.download = 'E-Voting-ID-Card-' + userId + '.png';
+        link.href = url;
+        document.body.appendChild(link);
+        link.click();
+        document.body.removeChild(link);
+        URL.revokeObjectURL(url);
+
+        button.disabled = false;
+        button.textContent = '📥 Download ID Card as Image';
+      }, 'image/png', 1.0);
+    }).catch(function(error) {
+      console.error('Error generating ID card:', error);
+      alert('Error generating ID card image. Please try again.');
+      button.disabled = false;
+      button.textContent = '📥 Download ID Card as Image';
+    });
+  }
+
+  // Wait for all images to load
+  if (totalImages === 0) {
+    generateCard();
+    return;
+  }
+
+  let checkComplete = function() {
+    imagesLoaded++;
+    if (imagesLoaded === totalImages) {
+      // Small delay to ensure rendering is complete
+      setTimeout(generateCard, 100);
+    }
+  };
+
+  images.forEach(img => {
+    if (img.complete && img.naturalHeight !== 0) {
+      checkComplete();
+    } else {
+      img.onload = checkComplete;
+      img.onerror = checkComplete;
+      // Force reload if needed
+      if (img.src) {
+        img.src = img.src + (img.src.indexOf('?') > -1 ? '&' : '?') + 't=' + new Date().getTime();
+      }
+    }
+  });
+}
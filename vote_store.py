@@ -0,0 +1,211 @@
+import os
+import csv
+import hashlib
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from file_lock import locked
+
+
+VOTE_FIELDS = ["id", "election_id", "voter_id", "candidate_id", "created_at"]
+
+
+class PartitionSealed(Exception):
+    """Raised when writing to the vote partition of a closed election."""
+
+
+class _PartitionIndex:
+    """In-memory view of one partition file, refreshed by reading only new bytes."""
+
+    def __init__(self):
+        self.offset = 0
+        self.votes_by_voter: Dict[str, dict] = {}
+        self.counts: Counter = Counter()
+        self.sealed = False
+
+    def reset(self):
+        self.__init__()
+
+    def add(self, row: dict):
+        # First ballot per voter wins, so counts and votes_by_voter never disagree.
+        if row["voter_id"] in self.votes_by_voter:
+            return
+        self.votes_by_voter[row["voter_id"]] = row
+        self.counts[row["candidate_id"]] += 1
+
+
+class VoteStore:
+    """
+    Votes partitioned per election under `votes_dir`.
+
+    - Active election:  <votes_dir>/<election_id>.csv (append-only)
+    - Closed election:  <votes_dir>/<election_id>.sealed.csv (read-only)
+
+    Each partition keeps a voter_id -> vote index so duplicate-vote checks are
+    O(1) and never touch the ballots of other elections. Writes and sealing take
+    <votes_dir>/<election_id>.lock so they are atomic across worker processes.
+    """
+
+    def __init__(self, votes_dir: str):
+        self.votes_dir = votes_dir
+        os.makedirs(votes_dir, exist_ok=True)
+        self._indexes: Dict[str, _PartitionIndex] = {}
+        self._lock = threading.RLock()
+
+    # ---- paths -------------------------------------------------------------
+
+    def _open_path(self, election_id: str) -> str:
+        return os.path.join(self.votes_dir, f"{election_id}.csv")
+
+    def _sealed_path(self, election_id: str) -> str:
+        return os.path.join(self.votes_dir, f"{election_id}.sealed.csv")
+
+    def partition_path(self, election_id: str) -> str:
+        """Return the file holding this election's votes (sealed or open)."""
+        sealed = self._sealed_path(election_id)
+        if os.path.exists(sealed):
+            return sealed
+        return self._open_path(election_id)
+
+    def _lock_path(self, election_id: str) -> str:
+        return os.path.join(self.votes_dir, f"{election_id}.lock")
+
+    def is_sealed(self, election_id: str) -> bool:
+        return os.path.exists(self._sealed_path(election_id))
+
+    # ---- index -------------------------------------------------------------
+
+    def _index(self, election_id: str) -> _PartitionIndex:
+        """Return the up-to-date index for a partition (caller holds the lock)."""
+        idx = self._indexes.setdefault(election_id, _PartitionIndex())
+        if idx.sealed:
+            return idx
+
+        sealed = self.is_sealed(election_id)
+        path = self._sealed_path(election_id) if sealed else self._open_path(election_id)
+        if not os.path.exists(path):
+            idx.reset()
+            return idx
+
+        size = os.path.getsize(path)
+        if size < idx.offset:
+            # File was replaced or truncated underneath us; start over.
+            idx.reset()
+        if size > idx.offset:
+            with open(path, "rb") as f:
+                f.seek(idx.offset)
+                chunk = f.read(size - idx.offset)
+            # Only consume complete lines; a concurrent writer may be mid-row.
+            end = chunk.rfind(b"\n") + 1
+            lines = chunk[:end].decode("utf-8").splitlines()
+            if idx.offset == 0 and lines:
+                lines = lines[1:]  # header
+            for values in csv.reader(lines):
+                if values:
+                    idx.add(dict(zip(VOTE_FIELDS, values)))
+            idx.offset += end
+        idx.sealed = sealed
+        return idx
+
+    # ---- reads -------------------------------------------------------------
+
+    def get_vote(self, election_id: str, voter_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._index(election_id).votes_by_voter.get(voter_id)
+
+    def counts(self, election_id: str) -> Counter:
+        """Return candidate_id -> vote count for one election."""
+        with self._lock:
+            return Counter(self._index(election_id).counts)
+
+    def total(self, election_id: str) -> int:
+        with self._lock:
+            return len(self._index(election_id).votes_by_voter)
+
+    def checksum(self, election_id: str) -> str:
+        """Return the sha256 hex digest of the election's partition file."""
+        h = hashlib.sha256()
+        path = self.partition_path(election_id)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(65536), b""):
+                    h.update(block)
+        return h.hexdigest()
+
+    # ---- writes ------------------------------------------------------------
+
+    def record_vote(self, row: dict) -> bool:
+        """
+        Append a vote to its election's partition.
+
+        - Returns False if the voter already voted in that election.
+        - Raises PartitionSealed if the election's partition is closed.
+        """
+        election_id = row["election_id"]
+        with self._lock, locked(self._lock_path(election_id)):
+            if self.is_sealed(election_id):
+                raise PartitionSealed(election_id)
+            idx = self._index(election_id)
+            if row["voter_id"] in idx.votes_by_voter:
+                return False
+
+            path = self._open_path(election_id)
+            new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+            with open(path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=VOTE_FIELDS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerow({k: row.get(k, "") for k in VOTE_FIELDS})
+            # Pick up our own row (and any rows other workers appended).
+            self._index(election_id)
+            return True
+
+    def seal(self, election_id: str):
+        """Close a partition: rename it to its sealed name and make it read-only."""
+        with self._lock, locked(self._lock_path(election_id)):
+            if self.is_sealed(election_id):
+                return
+            open_path = self._open_path(election_id)
+            sealed_path = self._sealed_path(election_id)
+            if os.path.exists(open_path):
+                os.replace(open_path, sealed_path)
+            else:
+                # Election with no ballots still gets an (empty) sealed partition.
+                with open(sealed_path, "w", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerow(VOTE_FIELDS)
+            os.chmod(sealed_path, 0o444)
+            self._indexes.pop(election_id, None)
+
+    # ---- migration ---------------------------------------------------------
+
+    def migrate_legacy(self, legacy_csv: str, closed_election_ids: Iterable[str]):
+        """
+        Split a single all-elections votes CSV into per-election partitions.
+
+        Partitions of closed elections are sealed. The legacy file is renamed
+        to `<name>.migrated` so the split only happens once.
+        """
+        with self._lock, locked(os.path.join(self.votes_dir, "migrate.lock")):
+            # Another worker may have finished the migration while we waited.
+            if os.path.exists(legacy_csv):
+                self._migrate_legacy(legacy_csv, closed_election_ids)
+
+    def _migrate_legacy(self, legacy_csv: str, closed_election_ids: Iterable[str]):
+        by_election: Dict[str, List[dict]] = {}
+        with open(legacy_csv, newline="", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                by_election.setdefault(r.get("election_id", ""), []).append(r)
+
+        for election_id, rows in by_election.items():
+            if not election_id or os.path.exists(self.partition_path(election_id)):
+                continue
+            with open(self._open_path(election_id), "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=VOTE_FIELDS)
+                writer.writeheader()
+                for r in rows:
+                    writer.writerow({k: r.get(k, "") for k in VOTE_FIELDS})
+        for election_id in closed_election_ids:
+            if election_id in by_election:
+                self.seal(election_id)
+        os.replace(legacy_csv, legacy_csv + ".migrated")